@@ -10,7 +10,7 @@ if check_login():
     accessible_branches = st.session_state.get("accessible_branches", [])
     st.title("📊 Sales Analytics Dashboard")
 
-    data, all_branches = load_dashboard_data(None)
+    data, all_branches, load_token = load_dashboard_data(None)
     if data.empty:
         st.warning("No data available.")
         st.stop()
@@ -39,14 +39,20 @@ if check_login():
         st.warning("No data matches selected filters.")
         st.stop()
 
+    # Keep only the financiers present in the filtered view
+    filtered_data['Banker_Name'] = filtered_data['Banker_Name'].cat.remove_unused_categories()
+
+    # Cache key for every derived aggregation: this load plus the sidebar filters
+    data_key = (load_token, tuple(dates), tuple(sel_branches))
+
     primary_role = user_roles[0] if user_roles else "Guest"
-    render_metrics(filtered_data, primary_role)
+    render_metrics(filtered_data, primary_role, data_key)
 
     if "Owner" in user_roles:
-        render_owner_view(filtered_data)
+        render_owner_view(filtered_data, data_key)
     elif "Back Office" in user_roles:
-        render_backoffice_view(filtered_data)
+        render_backoffice_view(filtered_data, data_key)
     elif "Insurance/TR" in user_roles:
-        render_insurance_tr_view(filtered_data)
+        render_insurance_tr_view(filtered_data, data_key)
     else:
         st.info("No dashboard view configured for this role.")
\ No newline at end of file
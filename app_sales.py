@@ -2,6 +2,7 @@ import streamlit as st
 import io
 from datetime import datetime
 from typing import Dict, Any
+from urllib.parse import quote
 
 from core.database import db_session
 from core import models
@@ -46,7 +47,7 @@ if 'selected_branch_name' not in st.session_state: st.session_state.selected_bra
 
 def generate_approval_link(owner_phone, customer, vehicle, discount, amount):
     msg = f"⚠️ *Approval Request* ⚠️\n\n*Customer:* {customer}\n*Vehicle:* {vehicle}\n*Discount:* ₹{discount:,.0f}\n*Final Price:* ₹{amount:,.0f}\n\nPlease approve in Dashboard."
-    return f"https://wa.me/{owner_phone}?text={msg.replace(' ', '%20')}"
+    return f"https://wa.me/{owner_phone}?text={quote(msg, safe='')}"
 
 
 # --- RESET LOGIC ---
@@ -181,6 +181,13 @@ def create_sales_record(db: Session, record_data: Dict[str, Any]):
         raise Exception(f"Transaction failed: {e}")
 
 
+def calculate_dd_shortfall(expected: float, initial: float, recovery: float) -> Dict[str, Any]:
+    """Pure shortfall recompute for a DD payment update."""
+    total_received = (initial or 0.0) + (recovery or 0.0)
+    new_shortfall = (expected or 0.0) - total_received
+    return {'Payment_Shortfall': new_shortfall, 'has_dues': new_shortfall > 0}
+
+
 def update_dd_payment(db: Session, record_id: int, new_initial_dd: float = None, new_shortfall_rec: float = None):
     try:
         record = db.query(models.SalesRecord).filter(models.SalesRecord.id == record_id).first()
@@ -191,14 +198,9 @@ def update_dd_payment(db: Session, record_id: int, new_initial_dd: float = None,
         if new_shortfall_rec is not None:
             record.shortfall_received = new_shortfall_rec
 
-        initial = record.Payment_DD_Received or 0.0
-        recovery = record.shortfall_received or 0.0
-        total_received = initial + recovery
-        expected = record.Payment_DD or 0.0
-        new_shortfall = expected - total_received
-
-        record.Payment_Shortfall = new_shortfall
-        record.has_dues = True if new_shortfall > 0 else False
+        dues = calculate_dd_shortfall(record.Payment_DD, record.Payment_DD_Received, record.shortfall_received)
+        record.Payment_Shortfall = dues['Payment_Shortfall']
+        record.has_dues = dues['has_dues']
         db.commit()
     except Exception as e:
         db.rollback()
@@ -215,19 +217,27 @@ def log_sale(db: Session, branch_id: str, model: str, var: str, color: str, qty:
     db.commit()
 
 
-def update_insurance_tr_status(db: Session, record_id: int, updates: Dict[str, Any]):
-    try:
-        record = db.query(models.SalesRecord).filter(models.SalesRecord.id == record_id).first()
-        if not record: return
+def bulk_update_insurance_tr_status(db: Session, updates: List[Tuple[int, Dict[str, Any]]]):
+    """
+    Applies (record_id, changes) edits from the Insurance/TR editor as one bulk UPDATE
+    and a single commit.
+    """
+    ignore_keys = ['has_dues']
+    mappings = []
+    for record_id, changes in updates:
+        values = {k: v for k, v in changes.items() if k not in ignore_keys and hasattr(models.SalesRecord, k)}
+        if values:
+            mappings.append({'id': record_id, **values})
+    if not mappings:
+        return
 
-        ignore_keys = ['has_dues']
-        for key, value in updates.items():
-            if key not in ignore_keys and hasattr(record, key):
-                setattr(record, key, value)
+    try:
+        # Rows sharing the same set of touched columns go out as one executemany
+        db.bulk_update_mappings(models.SalesRecord, mappings)
         db.commit()
     except Exception as e:
         db.rollback()
-        st.error(f"Error updating record {record_id}: {e}")
+        raise Exception(f"Bulk Insurance/TR update failed: {e}")
 
 
 def create_approval_request(db: Session, order_data: dict, branch_id: str):
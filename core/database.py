@@ -23,14 +23,24 @@ else:
     SQLALCHEMY_DATABASE_URL = "sqlite:///./sales_data_dev.db" 
 
 # --- 3. CREATE ENGINE ---
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False 
-)
+@st.cache_resource
+def get_engine():
+    """Single engine (and connection pool) shared across reruns and sessions."""
+    return create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_pre_ping=True,
+        echo=False
+    )
+
+engine = get_engine()
 
 # --- 4. SESSION AND BASE ---
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@st.cache_resource
+def get_session_factory():
+    """Session factory bound to the shared engine; built once per process."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+SessionLocal = get_session_factory()
 Base = declarative_base()
 
 # Dependency for legacy support
@@ -1,4 +1,5 @@
 import altair as alt
+import pandas as pd
 import streamlit as st
 
 alt.theme.active = "streamlit"
@@ -15,11 +16,11 @@ def plot_sales_by_banker_and_staff(data):
     Plots a stacked bar chart showing units sold by Financier (Banker Name), 
     segmented by the responsible Sales Staff.
     """
-    # Filter out cash sales for this finance-focused chart
-    banker_data = data[data['Banker_Name'] != 'N/A (Cash Sale)'].copy()
+    # Filter out cash sales for this finance-focused chart, keeping only the encoded columns
+    banker_data = data.loc[data['Banker_Name'] != 'N/A (Cash Sale)', ['Banker_Name', 'Sales_Staff']]
     
     # Calculate totals per banker to sort the Y-axis
-    banker_summary = banker_data.groupby('Banker_Name').size().reset_index(name='TotalUnits')
+    banker_summary = banker_data.groupby('Banker_Name', sort=False, observed=True).size().reset_index(name='TotalUnits')
     banker_names_sorted = banker_summary.sort_values('TotalUnits', ascending=False)['Banker_Name'].tolist()
 
     chart = alt.Chart(banker_data).mark_bar().encode(
@@ -38,21 +39,31 @@ def plot_sales_by_banker_and_staff(data):
     st.altair_chart(chart, use_container_width=True)
 # --- END NEW CHART FUNCTION ---
 
-def plot_vehicle_drilldown(data):
+@st.cache_data(show_spinner=False, max_entries=50)
+def _movement_summary(data_key, _data: pd.DataFrame) -> pd.DataFrame:
+    """Unit counts per Model/Variant/Color/Movement, so the drilldown ships counts instead of raw rows."""
+    return _data.groupby(
+        ['Model', 'Variant', 'Paint_Color', 'Movement_Category'], dropna=False, sort=False, observed=True
+    ).size().reset_index(name='Units')
+
+
+def plot_vehicle_drilldown(data, data_key):
     """
     Creates a stacked bar chart of Models by Variant,
     which filters a chart of Colors stacked by Movement Category.
     """
+    data = _movement_summary(data_key, data)
+
     # 1. Create the selection
     model_selection = alt.selection_point(fields=['Model'], empty=True, name="ModelSelect")
 
     # 2. Top Chart: Models Stacked by Variant
     chart_model = alt.Chart(data).mark_bar().encode(
         x=alt.X('Model', title='Vehicle Model', sort='-y'),
-        y=alt.Y('count()', title='Total Units Sold'),
+        y=alt.Y('sum(Units)', title='Total Units Sold'),
         color=alt.Color('Variant', title='Variant'),
         opacity=alt.condition(model_selection, alt.value(1.0), alt.value(0.3)),
-        tooltip=['Model', 'Variant', alt.Tooltip('count()', title='Units')]
+        tooltip=['Model', 'Variant', alt.Tooltip('sum(Units)', title='Units')]
     ).add_params(
         model_selection
     ).properties(
@@ -63,12 +74,12 @@ def plot_vehicle_drilldown(data):
     # 3. Bottom Chart: Colors Stacked by Movement Category
     chart_color_movement = alt.Chart(data).mark_bar().encode(
         x=alt.X('Paint_Color', title='Paint Color', sort='-y'),
-        y=alt.Y('count()', title='Units Sold'),
+        y=alt.Y('sum(Units)', title='Units Sold'),
         
         # --- UPDATED STACK ---
         color=alt.Color('Movement_Category', title='Movement', scale=COLOR_SCALE_MOV),
         
-        tooltip=['Model', 'Paint_Color', 'Movement_Category', alt.Tooltip('count()', title='Units')]
+        tooltip=['Model', 'Paint_Color', 'Movement_Category', alt.Tooltip('sum(Units)', title='Units')]
     ).transform_filter(
         model_selection # Filtered by the top chart
     ).properties(
@@ -81,7 +92,7 @@ def plot_vehicle_drilldown(data):
 
 def plot_top_staff(data):
     """Plots a horizontal bar chart for top sales staff by units sold."""
-    staff_data = data.groupby('Sales_Staff')['id'].count().reset_index(name='Units')
+    staff_data = data.groupby('Sales_Staff', sort=False, observed=True)['id'].count().reset_index(name='Units')
     staff_data = staff_data.sort_values('Units', ascending=False).head(10) # Top 10 only
     
     chart = alt.Chart(staff_data).mark_bar(color=PRIMARY_COLOR).encode(
@@ -95,7 +106,7 @@ def plot_top_staff(data):
 
 def plot_sales_by_type(data):
     """Plots a donut chart for MC vs SC."""
-    type_summary = data.groupby('Vehicle_Type')['id'].count().reset_index(name='Count')
+    type_summary = data.groupby('Vehicle_Type', sort=False, observed=True)['id'].count().reset_index(name='Count')
     
     base = alt.Chart(type_summary).encode(
         theta=alt.Theta("Count", stack=True),
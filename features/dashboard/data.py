@@ -1,5 +1,7 @@
+import time
 import streamlit as st
 import pandas as pd
+from urllib.parse import quote
 from core.database import get_db
 from core.data_manager import get_all_sales_records_for_dashboard, get_all_branches
 from core import models
@@ -9,7 +11,8 @@ from features.sales.config import get_movement_category, get_vehicle_type
 def load_dashboard_data(branch_id_filter: str):
     """
     Loads and preprocesses all necessary data for the dashboard.
-    Cached for 10 minutes to improve performance.
+    Cached for 10 minutes to improve performance. Also returns a token that is
+    new on every actual load, for keying the aggregations derived from it.
     """
     db = next(get_db())
     try:
@@ -84,6 +87,13 @@ def load_dashboard_data(branch_id_filter: str):
         data['Aging_Status'] = data.apply(get_aging_status, axis=1)
         # ---------------------------------------
 
+        # Low-cardinality string columns as categories: groupbys, filters and comparisons run on int codes
+        data['Banker_Name'] = data['Banker_Name'].astype('category')
+        data['fulfillment_status'] = data['fulfillment_status'].astype('category')
+        for col in ('Branch_Name', 'Model', 'Variant', 'Movement_Category'):
+            if col in data.columns:
+                data[col] = data[col].astype('category')
+
         # 2. WhatsApp Link Generation
         base_wa_url = "https://wa.me/"
 
@@ -98,7 +108,7 @@ def load_dashboard_data(branch_id_filter: str):
 
         def create_wa_link(phone: str, message: str) -> str | None:
             if len(phone) > 3 and phone.startswith('+91'):
-                return f"{base_wa_url}{phone}?text={message.replace(' ', '%20')}"
+                return f"{base_wa_url}{phone}?text={quote(message, safe='')}"
             return None
 
         def get_contextual_link(row):
@@ -114,6 +124,6 @@ def load_dashboard_data(branch_id_filter: str):
             else:
                 return create_wa_link(phone, GENERIC_MSG)
 
-        return data, all_branches
+        return data, all_branches, time.time_ns()
     finally:
         db.close()
\ No newline at end of file
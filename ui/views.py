@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
-from core.database import get_db, db_session
+from urllib.parse import quote
+from core.database import db_session
 from core import models
-from core.data_manager import update_dd_payment, update_insurance_tr_status
+from core.data_manager import update_dd_payment, bulk_update_insurance_tr_status
 from features.dashboard import charts
+from features.dashboard.data import load_dashboard_data
 
 BASE_WA_URL = "https://wa.me/"
 
@@ -12,6 +15,102 @@ INSURANCE_MSG = "*You’re covered!* \n\nGreat news—your vehicle insurance pol
 TR_MSG = "*Great news!* \n\nYour *TR* is successfully processed. \n\nPlease visit *Katakam Honda* to collect your documents. \n\n*Team Katakam Honda*"
 PLATES_MSG = "Your permanent number plates have arrived. \n\nPlease visit *Katakam Honda* between 10 AM - 6 PM for fitting. \n\nRegards, \n*Team Katakam Honda*"
 
+# URL-encoded once at import; quote() also escapes the *, newlines and punctuation in the templates
+ENCODED_WA_MSGS = {msg: quote(msg, safe='') for msg in (INSURANCE_MSG, TR_MSG, PLATES_MSG)}
+
+# Insurance/TR editor columns that offer a WhatsApp update when ticked: column -> (label, message)
+WA_TRIGGERS = {
+    'is_insurance_done': ('Insurance Completed', INSURANCE_MSG),
+    'is_tr_done': ('TR Done', TR_MSG),
+    'plates_received': ('Plates Received', PLATES_MSG)
+}
+
+
+# Owner cockpit views and their icons
+OWNER_VIEWS = {
+    "Financials": "💰",
+    "Sales Analytics": "📈",
+    "Actions & Approvals": "⚡"
+}
+
+# "DD Pending by Banker" headers and formats, applied client-side instead of renaming the frame
+BANKER_COLUMN_CONFIG = {
+    'Banker_Name': st.column_config.TextColumn("Financier"),
+    'Pending': st.column_config.NumberColumn("Total Due (₹)", format="₹%.0f"),
+    'Units': st.column_config.NumberColumn("File Count"),
+    'Files_0_7': st.column_config.NumberColumn("< 7 Days"),
+    'Files_7_15': st.column_config.NumberColumn("7-15 Days"),
+    'Files_15_Plus': st.column_config.NumberColumn("> 15 Days"),
+}
+
+# Columns shown to non-owner roles in the dues manager
+BACKOFFICE_VIEW_COLS = [
+    'DC_Number', 'Branch_Name', 'Timestamp', 'Customer_Name', 'Phone_Number', 'Model', 'Variant', 'Sales_Staff',
+    'Banker_Name', 'Finance_Executive', 'Payment_DownPayment', 'Price_ORP', 'Price_Negotiated_Final', 'Payment_DD',
+    'Payment_DD_Received', 'Live_Shortfall', 'Payment_Shortfall', 'shortfall_received', 'Aging_Status'
+]
+
+# Money columns formatted as ₹ in the dues table
+DUES_CURRENCY_COLS = [
+    'Payment_DD', 'Payment_DD_Received', 'Live_Shortfall', 'shortfall_received',
+    'Price_Negotiated_Final', 'Price_ORP', 'Payment_DownPayment', 'Payment_Shortfall',
+    'Discount_Given', 'price_hc', 'price_accessories', 'price_pr', 'price_ew',
+    'Charge_HP_Fee', 'Charge_Incentive', 'Price_Listed_Total'
+]
+
+# Read-only columns in the Insurance/TR editor
+INSURANCE_DISABLED_COLS = [
+    'id', 'DC_Number', 'Customer_Name', 'Model', 'chassis_no', 'engine_no',
+    'Phone_Number', 'WA_Phone', 'has_dues'
+]
+
+# Net Collections components: display label -> sales column
+COMP_MAP = {
+    "HC": "price_hc", "Accessories": "price_accessories", "PR Fees": "price_pr",
+    "Fin. Incentive": "Charge_Incentive", "HP Fees": "Charge_HP_Fee",
+    "Ext. Warranty": "price_ew", "Discounts": "Discount_Given"
+}
+# Reverse lookup (sales column -> display label), option order and default selection
+COMP_LABELS = {col: label for label, col in COMP_MAP.items()}
+COMP_OPTIONS = tuple(COMP_MAP)
+COMP_DEFAULTS = ("HC", "Accessories", "PR Fees", "Fin. Incentive", "HP Fees", "Discounts")
+
+# Fulfillment stages that belong in the Insurance/TR queue
+INSURANCE_QUEUE_STATUSES = frozenset({'PDI Complete', 'Insurance Done', 'TR Done', 'PDI In Progress'})
+
+# Columns shown in the Insurance/TR editor
+INSURANCE_QUEUE_COLS = [
+    'id', 'DC_Number', 'Customer_Name', 'Phone_Number', 'WA_Phone', 'Model', 'Variant', 'Paint_Color',
+    'Banker_Name', 'chassis_no', 'engine_no', 'ew_selection', 'is_insurance_done', 'is_tr_done',
+    'has_dues', 'has_double_tax', 'plates_received'
+]
+
+# Insurance/TR editor column config (built once at import)
+INSURANCE_COLUMN_CONFIG = {
+    'id': st.column_config.NumberColumn("ID", disabled=True),
+    'DC_Number': st.column_config.TextColumn("DC No.", disabled=True),
+    'Customer_Name': st.column_config.TextColumn("Customer", disabled=True),
+    'Phone_Number': st.column_config.TextColumn("Phone", disabled=True),
+    'WA_Phone': st.column_config.TextColumn("WA Phone", disabled=True),
+    'Model': st.column_config.TextColumn("Model", disabled=True),
+    'chassis_no': st.column_config.TextColumn("Chassis", disabled=True),
+    'engine_no': st.column_config.TextColumn("Engine", disabled=True),
+    'ew_selection': st.column_config.TextColumn("Extended Warranty", disabled=True),
+    # These are the editable columns
+    'is_insurance_done': st.column_config.CheckboxColumn("Insurance Done?"),
+    'is_tr_done': st.column_config.CheckboxColumn("TR Done?"),
+    'has_double_tax': st.column_config.CheckboxColumn("Double Tax?"),
+    'has_dues': st.column_config.CheckboxColumn("Dues?", disabled=True),
+    'plates_received': st.column_config.CheckboxColumn("Plates Received?"),
+}
+
+# Columns summed together for the KPI header (boolean flags sum to their True counts)
+KPI_SUM_COLS = [
+    'Price_Negotiated_Final', 'Payment_DD', 'Payment_DD_Received', 'Discount_Given',
+    'Charge_HP_Fee', 'Charge_Incentive', 'pr_fee_checkbox',
+    'is_tr_done', 'is_insurance_done', 'plates_received'
+]
+
 
 # --- ROW STYLING FUNCTION ---
 def style_aging_rows(row):
@@ -32,117 +131,240 @@ def send_wa_modal(phone: str, message: str, context: str):
     st.write(f"**Customer Phone:** {phone}")
     st.info(f"**Message Preview:**\n\n{message}")
     if phone and len(phone) > 10:
-        link = f"{BASE_WA_URL}{phone}?text={message.replace(' ', '%20')}"
+        encoded = ENCODED_WA_MSGS.get(message) or quote(message, safe='')
+        link = f"{BASE_WA_URL}{phone}?text={encoded}"
         st.link_button("🚀 Open WhatsApp", link, type="primary", use_container_width=True)
     else:
         st.error("Invalid phone number for WhatsApp.")
 
 
-def render_metrics(data, role):
+@st.cache_data(show_spinner=False, max_entries=50)
+def _banker_options(bankers: tuple) -> list:
+    """Financier pill options from the (already sorted) Banker_Name categories."""
+    return [str(b) for b in bankers if pd.notna(b) and b != '']
+
+
+@st.cache_data(show_spinner=False, max_entries=50)
+def _summaries(data_key, _data: pd.DataFrame) -> dict:
+    """Branch and banker groupby summaries shared by the owner and back-office views."""
+    # One pass per branch for the summary table and every Net Collections component
+    # (sum() skips NaN, so no fillna copy is needed first)
+    comp_cols = [c for c in COMP_MAP.values() if c in _data.columns]
+    # sort=True keeps branches in stable alphabetical (category) order across reloads
+    grouped = _data.groupby('Branch_Name', sort=True, observed=True).agg(
+        Rev=('Price_Negotiated_Final', 'sum'), Units=('id', 'count'),
+        Pending=('Live_Shortfall', 'sum'), **{c: (c, 'sum') for c in comp_cols}
+    )
+    branch = grouped[['Rev', 'Units', 'Pending']].reset_index()
+    components = grouped[comp_cols]
+
+    # One fused NumPy mask: financed sale (category code not missing, cash or blank) AND outstanding shortfall
+    bankers = _data['Banker_Name']
+    codes = bankers.cat.codes.to_numpy()
+    categories = bankers.cat.categories
+    cash_code = categories.get_loc('N/A (Cash Sale)') if 'N/A (Cash Sale)' in categories else -2
+    empty_code = categories.get_loc('') if '' in categories else -2
+    mask = (codes >= 0) & (codes != cash_code) & (codes != empty_code) & (_data['Live_Shortfall'].to_numpy() > 0)
+    banker_data = _data.loc[mask, ['Banker_Name', 'Live_Shortfall', 'id']]
+    if banker_data.empty:
+        return {'branch': branch, 'components': components, 'banker': pd.DataFrame()}
+
+    aging = _data['Aging_Days'].to_numpy()[mask]
+    banker = banker_data.assign(
+        Files_0_7=(aging < 7).astype(int),
+        Files_7_15=((aging >= 7) & (aging <= 15)).astype(int),
+        Files_15_Plus=(aging > 15).astype(int),
+    ).groupby('Banker_Name', sort=False, observed=True).agg(
+        Pending=('Live_Shortfall', 'sum'), Units=('id', 'count'),
+        Files_0_7=('Files_0_7', 'sum'), Files_7_15=('Files_7_15', 'sum'),
+        Files_15_Plus=('Files_15_Plus', 'sum')
+    ).reset_index().sort_values('Pending', ascending=False)
+    return {'branch': branch, 'components': components, 'banker': banker}
+
+
+@st.cache_data(show_spinner=False, max_entries=50)
+def _net_collections(data_key, valid_cols: tuple, _data: pd.DataFrame) -> pd.DataFrame:
+    """Net Collections table for the selected component columns, cached per selection."""
+    valid_cols = list(valid_cols)
+    components = _summaries(data_key, _data)['components']
+    # Plain-object branch labels so the GRAND TOTAL row can be written in below
+    grouped = components[valid_cols].reset_index().astype({'Branch_Name': object})
+    cols_to_add = [c for c in valid_cols if c != 'Discount_Given']
+    cols_to_sub = [c for c in valid_cols if c == 'Discount_Given']
+    total_series = pd.Series(0.0, index=grouped.index)
+    if cols_to_add: total_series += grouped[cols_to_add].sum(axis=1)
+    if cols_to_sub: total_series -= grouped[cols_to_sub].sum(axis=1)
+    grouped['Total'] = total_series
+    # Grand total written into one extra reindexed row instead of concatenating a second frame
+    sum_cols = valid_cols + ['Total']
+    n = len(grouped)
+    final_df = grouped.reindex(range(n + 1))
+    final_df.loc[n, 'Branch_Name'] = 'GRAND TOTAL'
+    final_df.loc[n, sum_cols] = grouped[sum_cols].to_numpy().sum(axis=0)
+    final_df.rename(columns=COMP_LABELS, inplace=True)
+    display_cols = ['Branch_Name'] + [COMP_LABELS[c] for c in valid_cols] + ['Total']
+    final_view = final_df[display_cols].rename(columns={'Branch_Name': 'Branch'})
+    return final_view
+
+
+@st.cache_data(show_spinner=False, max_entries=50)
+def _insurance_queue(data_key, _data: pd.DataFrame) -> pd.DataFrame:
+    """Insurance/TR queue rows and editor columns, matched on fulfillment_status category codes."""
+    status = _data['fulfillment_status']
+    if isinstance(status.dtype, pd.CategoricalDtype):
+        categories = status.cat.categories
+        wanted = [categories.get_loc(s) for s in INSURANCE_QUEUE_STATUSES if s in categories]
+        mask = np.isin(status.cat.codes.to_numpy(), wanted)
+    else:
+        mask = status.isin(INSURANCE_QUEUE_STATUSES).to_numpy()
+    # int32 ids halve that column's Arrow payload to the editor. No reset_index: edited_rows
+    # keys are row positions, and the save/popup paths index positionally (NumPy / iloc).
+    # Editable categoricals go back to plain text: the editor would render them as select
+    # boxes limited to the (filter-trimmed) categories, blocking free-text corrections.
+    return _data.loc[mask, INSURANCE_QUEUE_COLS].astype({'id': 'int32', 'Banker_Name': object, 'Variant': object})
+
+
+@st.cache_data(show_spinner=False, max_entries=50)
+def _role_kpis(data_key, _data: pd.DataFrame) -> dict:
+    """Computes all KPI reductions for render_metrics, cached per data key."""
+    total_sales = len(_data)
+    # One float64 slab and a single nansum instead of a pandas reduction per column;
+    # missing flags become NaN and are skipped, so they count as not done
+    slab = _data[KPI_SUM_COLS].to_numpy(dtype=np.float64, na_value=np.nan)
+    sums = dict(zip(KPI_SUM_COLS, np.nansum(slab, axis=0)))
+    bankers = _data['Banker_Name']
+    if 'N/A (Cash Sale)' in bankers.cat.categories:
+        cash_code = bankers.cat.categories.get_loc('N/A (Cash Sale)')
+        cash_sales_count = int(np.count_nonzero(bankers.cat.codes.to_numpy() == cash_code))
+    else:
+        cash_sales_count = 0
+    return {
+        'total_sales': total_sales,
+        'revenue': sums['Price_Negotiated_Final'],
+        'dd_expected': sums['Payment_DD'],
+        'dd_received': sums['Payment_DD_Received'],
+        'discount': sums['Discount_Given'],
+        'hp_fees': sums['Charge_HP_Fee'],
+        'incentives': sums['Charge_Incentive'],
+        'pr_count': sums['pr_fee_checkbox'],
+        'cash_count': cash_sales_count,
+        'finance_count': total_sales - cash_sales_count,
+        'tr_pending': total_sales - int(sums['is_tr_done']),
+        'insurance_pending': total_sales - int(sums['is_insurance_done']),
+        'plates_received': int(sums['plates_received']),
+    }
+
+
+def render_metrics(data, role, data_key):
     """Renders high-level KPIs based on user role."""
-    total_sales = len(data)
-    total_dd_expected = data['Payment_DD'].sum()
-    total_dd_received = data['Payment_DD_Received'].sum()
-    total_dd_pending = total_dd_expected - total_dd_received
+    kpis = _role_kpis(data_key, data)
+    total_dd_expected = kpis['dd_expected']
+    total_dd_pending = total_dd_expected - kpis['dd_received']
+
+    # Rows of (label, value, width); each row is one st.columns call
+    if role == "Owner":
+        rows = [
+            [("Revenue", f"₹{kpis['revenue']:,.0f}", "content"),
+             ("Units Sold", f"{kpis['total_sales']}", "stretch"),
+             ("Cash Sale", f"{kpis['cash_count']}", "stretch"),
+             ("Total Finance sale count", f"{kpis['finance_count']}", "stretch"),
+             ("Discounts", f"₹{kpis['discount']:,.0f}", "content")],
+            [("Total PR", f"{int(kpis['pr_count'])}", "stretch"),
+             ("Total HP Fees", f"₹{kpis['hp_fees']:,.0f}", "stretch"),
+             ("Total Finance Incentives", f"₹{kpis['incentives']:,.0f}", "stretch"),
+             ("DD Pending", f"₹{total_dd_pending:,.0f}", "content"),
+             ("DD Expected", f"₹{total_dd_expected:,.0f}", "stretch")],
+        ]
+    elif role == "Back Office":
+        rows = [
+            [("Units Sold", f"{kpis['total_sales']}", "stretch"),
+             ("DD Expected", f"₹{total_dd_expected:,.0f}", "stretch"),
+             ("DD Pending", f"₹{total_dd_pending:,.0f}", "stretch")],
+        ]
+    elif role == 'Insurance/TR':
+        rows = [
+            [("Total invoice/TR Pending", f"{kpis['tr_pending']}", "stretch"),
+             ("Insurance Pending", f"{kpis['insurance_pending']:,.0f}", "stretch"),
+             ("Plates received", f"{kpis['plates_received']:,.0f}", "stretch")],
+        ]
+    else:
+        return
 
     with st.container(border=True):
-        if role == "Owner":
-            st.header("Key Metrics")
-            cols = st.columns(5)
-            cols[0].metric("Revenue", f"₹{data['Price_Negotiated_Final'].sum():,.0f}", width="content")
-            cols[1].metric("Units Sold", f"{total_sales}")
-            cash_sales_count = len(data[data['Banker_Name'] == 'N/A (Cash Sale)'])
-            cols[2].metric("Cash Sale", f"{cash_sales_count}")
-            finance_sales_count = total_sales - cash_sales_count
-            cols[3].metric("Total Finance sale count", f"{finance_sales_count}")
-            cols[4].metric("Discounts", f"₹{data['Discount_Given'].sum():,.0f}", width="content")
-            total_hp_collected = data['Charge_HP_Fee'].sum()
-            total_incentive_collected = data['Charge_Incentive'].sum()
-            total_pr_count = data['pr_fee_checkbox'].sum()
-            col6, col7, col8, col9, col10 = st.columns(5)
-            col6.metric("Total PR", f"{int(total_pr_count)}")
-            col7.metric("Total HP Fees", f"₹{total_hp_collected:,.0f}")
-            col8.metric("Total Finance Incentives", f"₹{total_incentive_collected:,.0f}")
-            col9.metric("DD Pending", f"₹{total_dd_pending:,.0f}", width="content")
-            col10.metric("DD Expected", f"₹{total_dd_expected:,.0f}")
-
-        elif role == "Back Office":
-            st.header("Key Metrics")
-            cols = st.columns(3)
-            cols[0].metric("Units Sold", f"{total_sales}")
-            cols[1].metric("DD Expected", f"₹{total_dd_expected:,.0f}")
-            cols[2].metric("DD Pending", f"₹{total_dd_pending:,.0f}")
-        elif role == 'Insurance/TR':
-            st.header("Key Metrics")
-            cols = st.columns(3)
-            total_tr_pending_count = len(data) - data['is_tr_done'].sum()
-            total_insurance_pending_count = len(data) - data['is_insurance_done'].sum()
-            total_plates_received = data['plates_received'].sum()
-            cols[0].metric("Total invoice/TR Pending", f"{total_tr_pending_count}")
-            cols[1].metric("Insurance Pending", f"{total_insurance_pending_count:,.0f}")
-            cols[2].metric("Plates received", f"{total_plates_received:,.0f}")
-
-
-def render_owner_view(data):
+        st.header("Key Metrics")
+        for row in rows:
+            for col, (label, value, width) in zip(st.columns(len(row)), row):
+                col.metric(label, value, width=width)
+
+
+def render_owner_view(data, data_key):
     """
     Renders the 'Cockpit' View for Owners using a horizontal segmented control style.
     """
     # 1. VIEW SELECTOR
-    views = {
-        "Financials": "💰",
-        "Sales Analytics": "📈",
-        "Actions & Approvals": "⚡"
-    }
-
     selected_view_name = st.radio(
         "Dashboard View:",
-        options=list(views.keys()),
-        format_func=lambda x: f"{views[x]}  {x}",
+        options=list(OWNER_VIEWS),
+        format_func=lambda x: f"{OWNER_VIEWS[x]}  {x}",
         horizontal=True,
         label_visibility="collapsed",
         key="owner_view_selector"
     )
     st.markdown("---")
 
+    # Only the selected view is rendered; each tab body is a fragment so its own
+    # widgets (e.g. the Net Collections multiselect) rerun just that tab.
     if selected_view_name == "Financials":
-        c_left, c_right = st.columns([3, 2])
-        with c_left:
-            st.subheader("Summary by Branch")
-            bsum = data.groupby('Branch_Name').agg(
-                Rev=('Price_Negotiated_Final', 'sum'), Units=('id', 'count'),
-                Pending=('Live_Shortfall', 'sum')
-            ).reset_index()
-            bdisp = bsum.copy()
-            bdisp['Rev'] = bdisp['Rev'].apply(lambda x: f"₹{(x)}")
-            bdisp['Pending'] = bdisp['Pending'].apply(lambda x: f"₹{(x)}")
-            st.dataframe(bdisp, use_container_width=True, hide_index=True)
-        with c_right:
-            render_banker_table(data)
-        with st.expander("🧩 Net Collections Analysis", expanded=False):
-            render_net_collections_logic(data)
+        render_financials_tab(data, data_key)
 
     elif selected_view_name == "Sales Analytics":
-        c1, c2 = st.columns(2)
-        with c1:
-            st.caption("Top Performing Staff")
-            charts.plot_top_staff(data)
-        with c2:
-            st.caption("Sales by Model & Variant")
-            charts.plot_vehicle_drilldown(data)
-        st.divider()
-        c3, c4 = st.columns(2)
-        with c3:
-            st.caption("Banker Performance")
-            charts.plot_sales_by_banker_and_staff(data)
-        with c4:
-            st.caption("Vehicle Type Split")
-            charts.plot_sales_by_type(data)
+        render_sales_analytics_tab(data, data_key)
 
     elif selected_view_name == "Actions & Approvals":
         render_approval_section()
         render_dues_manager(data, "Owner")
 
 
+@st.fragment
+def render_financials_tab(data, data_key):
+    c_left, c_right = st.columns([3, 2])
+    with c_left:
+        st.subheader("Summary by Branch")
+        bsum = _summaries(data_key, data)['branch']
+        st.dataframe(
+            bsum,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Rev': st.column_config.NumberColumn(format="₹%.0f"),
+                'Pending': st.column_config.NumberColumn(format="₹%.0f"),
+            }
+        )
+    with c_right:
+        render_banker_table(data, data_key)
+    with st.expander("🧩 Net Collections Analysis", expanded=False):
+        render_net_collections_logic(data, data_key)
+
+
+@st.fragment
+def render_sales_analytics_tab(data, data_key):
+    c1, c2 = st.columns(2)
+    with c1:
+        st.caption("Top Performing Staff")
+        charts.plot_top_staff(data)
+    with c2:
+        st.caption("Sales by Model & Variant")
+        charts.plot_vehicle_drilldown(data, data_key)
+    st.divider()
+    c3, c4 = st.columns(2)
+    with c3:
+        st.caption("Banker Performance")
+        charts.plot_sales_by_banker_and_staff(data)
+    with c4:
+        st.caption("Vehicle Type Split")
+        charts.plot_sales_by_type(data)
+
+
 def render_approval_section():
     """Fetches and displays pending approvals from the dedicated table."""
     st.subheader("🔔 Approval Requests")
@@ -179,122 +401,50 @@ def render_approval_section():
                             st.rerun()
 
 
-def render_net_collections_logic(data):
+def render_net_collections_logic(data, data_key):
     c_head, c_sel = st.columns([1, 2])
     with c_head:
         st.subheader("Analysis")
-    comp_map = {
-        "HC": "price_hc", "Accessories": "price_accessories", "PR Fees": "price_pr",
-        "Fin. Incentive": "Charge_Incentive", "HP Fees": "Charge_HP_Fee",
-        "Ext. Warranty": "price_ew", "Discounts": "Discount_Given"
-    }
-    default_opts = ["HC", "Accessories", "PR Fees", "Fin. Incentive", "HP Fees", "Discounts"]
     with c_sel:
-        selected_labels = st.multiselect("Include Components:", options=list(comp_map.keys()), default=default_opts,
+        selected_labels = st.multiselect("Include Components:", options=COMP_OPTIONS, default=COMP_DEFAULTS,
                                          key="owner_comp_select", label_visibility="collapsed")
 
     if selected_labels:
-        selected_cols = [comp_map[label] for label in selected_labels]
+        selected_cols = [COMP_MAP[label] for label in selected_labels]
         valid_cols = [c for c in selected_cols if c in data.columns]
         if valid_cols:
-            df_calc = data[['Branch_Name'] + valid_cols].copy()
-            df_calc[valid_cols] = df_calc[valid_cols].fillna(0.0)
-            grouped = df_calc.groupby('Branch_Name')[valid_cols].sum().reset_index()
-            cols_to_add = [c for c in valid_cols if c != 'Discount_Given']
-            cols_to_sub = [c for c in valid_cols if c == 'Discount_Given']
-            total_series = pd.Series(0.0, index=grouped.index)
-            if cols_to_add: total_series += grouped[cols_to_add].sum(axis=1)
-            if cols_to_sub: total_series -= grouped[cols_to_sub].sum(axis=1)
-            grouped['Total'] = total_series
-            grand_sums = grouped[valid_cols + ['Total']].sum()
-            total_row = pd.DataFrame(grand_sums).T
-            total_row['Branch_Name'] = 'GRAND TOTAL'
-            final_df = pd.concat([grouped, total_row], ignore_index=True)
-            fmt_cols = ['Total'] + valid_cols
-            for col in fmt_cols: final_df[col] = final_df[col].apply(lambda x: f"₹{x:,.0f}")
-            reverse_map = {v: k for k, v in comp_map.items()}
-            final_df.rename(columns=reverse_map, inplace=True)
-            display_cols = ['Branch_Name'] + [reverse_map[c] for c in valid_cols] + ['Total']
-            final_view = final_df[display_cols].rename(columns={'Branch_Name': 'Branch'})
-            st.dataframe(final_view, use_container_width=True, hide_index=True)
-
-
-def render_backoffice_view(data):
-    render_banker_table(data)
+            final_view = _net_collections(data_key, tuple(valid_cols), data)
+            # Values stay numeric (sortable); ₹ formatting happens client-side, like the branch table
+            column_config = {COMP_LABELS[c]: st.column_config.NumberColumn(format="₹%.0f") for c in valid_cols}
+            column_config['Total'] = st.column_config.NumberColumn(format="₹%.0f")
+            st.dataframe(final_view, use_container_width=True, hide_index=True, column_config=column_config)
+
+
+def render_backoffice_view(data, data_key):
+    render_banker_table(data, data_key)
     render_dues_manager(data, "Back Office")
 
 
-def render_insurance_tr_view(data: pd.DataFrame):
+def render_insurance_tr_view(data: pd.DataFrame, data_key):
     """
     Renders the focused view for the Insurance/TR team.
     Shows records that have completed PDI but not TR.
     """
     st.header("Insurance & TR Processing Queue")
 
-    # 1. Filter data to the relevant queue
-    # We only want to see records that are 'PDI Complete' or 'Insurance Done'
-    statuses_to_show = ['PDI Complete', 'Insurance Done', 'TR Done', 'PDI In Progress']
-    queue_df = data[data['fulfillment_status'].isin(statuses_to_show)].copy()
+    # 1. Filter data to the relevant queue (cached per data key)
+    df_to_show = _insurance_queue(data_key, data)
 
-    if queue_df.empty:
+    if df_to_show.empty:
         st.info("No vehicles are currently pending Insurance or TR processing.")
         return
 
-    # 2. Define columns for the data editor
-    columns_to_show = [
-        'id',
-        'DC_Number',
-        'Customer_Name',
-        'Phone_Number',
-        'WA_Phone',
-        'Model',
-        'Variant',
-        'Paint_Color',
-        'Banker_Name',
-        'chassis_no',
-        'engine_no',
-        'ew_selection',
-        'is_insurance_done',
-        'is_tr_done',
-        'has_dues',
-        'has_double_tax',
-        'plates_received'
-    ]
-
-    # Filter the DataFrame
-    df_to_show = queue_df[columns_to_show].reset_index(drop=True)
-
-    # 3. Configure the data editor
-    column_config = {
-        'id': st.column_config.NumberColumn("ID", disabled=True),
-        'DC_Number': st.column_config.TextColumn("DC No.", disabled=True),
-        'Customer_Name': st.column_config.TextColumn("Customer", disabled=True),
-        'Phone_Number': st.column_config.TextColumn("Phone", disabled=True),
-        'WA_Phone': st.column_config.TextColumn("WA Phone", disabled=True),
-        'Model': st.column_config.TextColumn("Model", disabled=True),
-        'chassis_no': st.column_config.TextColumn("Chassis", disabled=True),
-        'engine_no': st.column_config.TextColumn("Engine", disabled=True),
-        'ew_selection': st.column_config.TextColumn("Extended Warranty", disabled=True),
-        # These are the editable columns
-        'is_insurance_done': st.column_config.CheckboxColumn("Insurance Done?"),
-        'is_tr_done': st.column_config.CheckboxColumn("TR Done?"),
-        'has_double_tax': st.column_config.CheckboxColumn("Double Tax?"),
-        'has_dues': st.column_config.CheckboxColumn("Dues?", disabled=True),
-        'plates_received': st.column_config.CheckboxColumn("Plates Received?"),
-    }
-
-    # Define which columns are disabled
-    disabled_cols = [
-        'id', 'DC_Number', 'Customer_Name', 'Model', 'chassis_no', 'engine_no',
-        'Phone_Number', 'WA_Phone', 'has_dues'
-    ]
-
     editor_key = "insurance_tr_editor"
 
     edited_df = st.data_editor(
         df_to_show,
-        column_config=column_config,
-        disabled=disabled_cols,
+        column_config=INSURANCE_COLUMN_CONFIG,
+        disabled=INSURANCE_DISABLED_COLS,
         hide_index=True,
         use_container_width=True,
         key=editor_key
@@ -307,145 +457,115 @@ def render_insurance_tr_view(data: pd.DataFrame):
             st.session_state.processed_wa_popups = set()
 
         edited_rows = st.session_state[editor_key]["edited_rows"]
+        processed = st.session_state.processed_wa_popups
+        wa_phones = df_to_show['WA_Phone'].to_numpy()
 
-        # Iterate through edits to find newly checked boxes
-        for idx_str, changes in edited_rows.items():
-            idx = int(idx_str)
-
-            # Define the columns we want to trigger notifications for
-            trigger_map = {
-                'is_insurance_done': ('Insurance Completed', INSURANCE_MSG),
-                'is_tr_done': ('TR Done', TR_MSG),
-                'plates_received': ('Plates Received', PLATES_MSG)
-            }
+        # Trigger cells ticked / unticked in this batch of edits
+        checked = {(int(idx), col) for idx, changes in edited_rows.items()
+                   for col, val in changes.items() if col in WA_TRIGGERS and val is True}
+        unchecked = {(int(idx), col) for idx, changes in edited_rows.items()
+                     for col, val in changes.items() if col in WA_TRIGGERS and val is False}
 
-            for col, label_msg_tuple in trigger_map.items():
-                # If this specific column was changed to True
-                if changes.get(col) is True:
-                    unique_interaction_id = f"{idx}_{col}"
+        # Unchecked boxes are forgotten so they can trigger again if re-checked
+        processed -= unchecked
 
-                    # Only show if we haven't shown it yet
-                    if unique_interaction_id not in st.session_state.processed_wa_popups:
-                        # Get Phone Number
-                        phone = df_to_show.iloc[idx]['WA_Phone']
-                        label, msg = label_msg_tuple
+        # Only show popups we haven't shown yet
+        for interaction in checked - processed:
+            idx, col = interaction
+            phone = wa_phones[idx]
+            label, msg = WA_TRIGGERS[col]
 
-                        # Mark as processed BEFORE showing to prevent infinite loop on re-render
-                        st.session_state.processed_wa_popups.add(unique_interaction_id)
+            # Mark as processed BEFORE showing to prevent infinite loop on re-render
+            processed.add(interaction)
 
-                        # Trigger Dialog
-                        send_wa_modal(phone, msg, label)
+            # Trigger Dialog
+            send_wa_modal(phone, msg, label)
 
-                # Optional: If unchecked (False), remove from processed so it can trigger again if re-checked
-                elif changes.get(col) is False:
-                    unique_interaction_id = f"{idx}_{col}"
-                    if unique_interaction_id in st.session_state.processed_wa_popups:
-                        st.session_state.processed_wa_popups.remove(unique_interaction_id)
-
-    # 4. Add the Save button
+    # 2. Add the Save button
     if st.button("Save Insurance/TR Updates", type="primary"):
         if editor_key in st.session_state and st.session_state[editor_key]["edited_rows"]:
-            db = next(get_db())
-            try:
-                updates = 0
-                # Get the changes from session state
-                edited_rows = st.session_state[editor_key]["edited_rows"]
-
-                for idx, changes in edited_rows.items():
-                    # Get the 'id' of the record from our filtered DataFrame
-                    record_id = int(df_to_show.iloc[int(idx)]['id'])
-
-                    # 'changes' is a dict like {'is_insurance_done': True}
-                    update_insurance_tr_status(db, record_id, changes)
-                    updates += 1
-
-                st.success(f"Updated {updates} records!")
-
-                # Clear session state related to edits and popups
-                if "processed_wa_popups" in st.session_state:
-                    del st.session_state.processed_wa_popups
-
-                st.cache_data.clear()  # Clear the cache to refresh data
-                st.rerun()
-            except Exception as e:
-                st.error(f"Save failed: {e}")
-            finally:
-                db.close()
+            with db_session() as db:
+                try:
+                    # Get the changes from session state
+                    edited_rows = st.session_state[editor_key]["edited_rows"]
+
+                    # Keep only rows with actual changes, then map positions to ids in one NumPy gather
+                    rows = [(int(i), changes) for i, changes in edited_rows.items() if changes]
+                    positions = np.fromiter((pos for pos, _ in rows), dtype=np.int64, count=len(rows))
+                    record_ids = df_to_show['id'].to_numpy()[positions]
+
+                    # 'changes' is a dict like {'is_insurance_done': True}; one query and commit for the batch
+                    bulk_update_insurance_tr_status(
+                        db, [(int(record_id), changes) for record_id, (_, changes) in zip(record_ids, rows)]
+                    )
+
+                    st.success(f"Updated {len(record_ids)} records!")
+
+                    # Clear session state related to edits and popups
+                    if "processed_wa_popups" in st.session_state:
+                        del st.session_state.processed_wa_popups
+
+                    load_dashboard_data.clear()  # Reload the sales data; the new load token re-keys the aggregations
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Save failed: {e}")
         else:
             st.info("No changes to save.")
 
 
-def render_banker_table(data):
+def render_banker_table(data, data_key):
     st.subheader("DD Pending by Banker")
-    mask = (data['Banker_Name'].notna()) & (data['Banker_Name'] != '') & (data['Banker_Name'] != 'N/A (Cash Sale)') & (
-                data['Live_Shortfall'] > 0)
-    banker_data = data[mask].copy()
-    if not banker_data.empty:
-        banker_data['Files_0_7'] = banker_data['Aging_Days'].apply(lambda x: 1 if x < 7 else 0)
-        banker_data['Files_7_15'] = banker_data['Aging_Days'].apply(lambda x: 1 if 7 <= x <= 15 else 0)
-        banker_data['Files_15_Plus'] = banker_data['Aging_Days'].apply(lambda x: 1 if x > 15 else 0)
-        summary = banker_data.groupby('Banker_Name').agg(
-            Pending=('Live_Shortfall', 'sum'), Units=('id', 'count'),
-            Files_0_7=('Files_0_7', 'sum'), Files_7_15=('Files_7_15', 'sum'),
-            Files_15_Plus=('Files_15_Plus', 'sum')
-        ).reset_index().sort_values('Pending', ascending=False)
-
-        summary = summary.rename(columns={
-            "Banker_Name": "Financier",
-            "Pending": "Total Due (₹)",
-            "Units": "File Count",
-            "Files_0_7": "< 7 Days",
-            "Files_7_15": "7-15 Days",
-            "Files_15_Plus": "> 15 Days"
-        })
-        st.dataframe(summary, use_container_width=True, hide_index=True)
+    summary = _summaries(data_key, data)['banker']
+    if not summary.empty:
+        st.dataframe(summary, use_container_width=True, hide_index=True, column_config=BANKER_COLUMN_CONFIG)
     else:
         st.info("No pending DD amounts for bankers.")
 
 
+@st.fragment
 def render_dues_manager(data, role):
+    """Financier pills, records table and DD update form; pill clicks rerun only this fragment."""
     st.markdown("---")
     st.header("Sales Records & Dues Management")
-    banker_options = sorted([str(b) for b in data['Banker_Name'].unique() if pd.notna(b) and b != ''])
+    banker_options = _banker_options(tuple(data['Banker_Name'].cat.categories))
     selected_bankers = st.pills("Filter by Financier:", options=banker_options, selection_mode="multi",
                                 key="banker_pills", default=None)
 
-    if selected_bankers:
-        df_display = data[data['Banker_Name'].isin(selected_bankers)].copy().reset_index(drop=True)
+    # Nothing or every financier selected skips the isin scan entirely
+    dues_mask = (data['has_dues'] == True).to_numpy()
+    if not selected_bankers or len(selected_bankers) >= len(banker_options):
+        row_mask = slice(None)
     else:
-        df_display = data.copy().reset_index(drop=True)
-
-    view_cols = ['DC_Number', 'Branch_Name', 'Timestamp', 'Customer_Name', 'Phone_Number', 'Model', 'Variant', 'Sales_Staff',
-                 'Banker_Name',
-                 'Finance_Executive', 'Payment_DownPayment', 'Price_ORP', 'Price_Negotiated_Final', 'Payment_DD',
-                 'Payment_DD_Received',
-                 'Live_Shortfall', 'Payment_Shortfall', 'shortfall_received', 'Aging_Status', ]
+        row_mask = data['Banker_Name'].isin(selected_bankers).to_numpy()
+        dues_mask &= row_mask
 
+    # Rows and role columns selected in one step, so unused columns are never copied
     if role == "Owner":
-        final_view_df = df_display.copy()
+        final_view_df = data.loc[row_mask]
     else:
-        final_view_df = df_display[view_cols].copy()
+        final_view_df = data.loc[row_mask, BACKOFFICE_VIEW_COLS]
 
-    currency_candidates = ['Payment_DD', 'Payment_DD_Received', 'Live_Shortfall', 'shortfall_received',
-                           'Price_Negotiated_Final', 'Price_ORP', 'Payment_DownPayment', 'Payment_Shortfall',
-                           'Discount_Given', 'price_hc', 'price_accessories', 'price_pr', 'price_ew',
-                           'Charge_HP_Fee', 'Charge_Incentive', 'Price_Listed_Total']
-    format_dict = {col: '₹{:,.2f}' for col in currency_candidates if col in final_view_df.columns}
+    format_dict = {col: '₹{:,.2f}' for col in DUES_CURRENCY_COLS if col in final_view_df.columns}
     styled_df = final_view_df.style.apply(style_aging_rows, axis=1).format(format_dict)
-    st.dataframe(styled_df, use_container_width=True, height=400)
+    st.dataframe(styled_df, use_container_width=True, hide_index=True, height=400)
 
     # Update Form
     st.subheader("Update Payment Record")
-    pending_records = df_display[df_display['has_dues'] == True].copy()
+    pending_records = data.loc[dues_mask]
     if not pending_records.empty:
-        pending_records['Label'] = pending_records.apply(
-            lambda x: f"{x['Customer_Name']} | {x['DC_Number']} | Pending: ₹{x['Live_Shortfall']:,.0f}", axis=1)
-        record_map = dict(zip(pending_records['Label'], pending_records['id']))
-        selected_label = st.selectbox("Select Record to Update:", options=pending_records['Label'].tolist(), index=None,
+        id_array = pending_records['id'].to_numpy()
+        labels = [
+            f"{name} | {dc} | Pending: ₹{due:,.0f}"
+            for name, dc, due in zip(pending_records['Customer_Name'], pending_records['DC_Number'],
+                                     pending_records['Live_Shortfall'])
+        ]
+        label_pos = {label: pos for pos, label in enumerate(labels)}
+        selected_label = st.selectbox("Select Record to Update:", options=labels, index=None,
                                       placeholder="Search by Customer Name or DC...")
         if selected_label:
-            record_id = record_map[selected_label]
-            rec_data = pending_records[pending_records['id'] == record_id].iloc[0]
+            pos = label_pos[selected_label]
+            record_id = int(id_array[pos])
+            rec_data = pending_records.iloc[pos]
             with st.container(border=True):
                 delivery_date = rec_data['Timestamp'].strftime('%d-%b-%Y') if pd.notna(rec_data['Timestamp']) else "N/A"
                 st.markdown(
@@ -466,14 +586,12 @@ def render_dues_manager(data, role):
                         new_shortfall_rec = st.number_input("Add Shortfall Recovery Amount (₹):",
                                                             value=float(rec_data['shortfall_received']))
                     if st.form_submit_button("💾 Save Updates", type="primary"):
-                        db = next(get_db())
-                        try:
-                            val_initial = new_dd_rec if not disable_initial else None
-                            update_dd_payment(db, int(record_id), val_initial, new_shortfall_rec)
-                            st.success(f"Updated record for {rec_data['Customer_Name']}!")
-                            st.cache_data.clear()
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Error: {e}")
-                        finally:
-                            db.close()
\ No newline at end of file
+                        with db_session() as db:
+                            try:
+                                val_initial = new_dd_rec if not disable_initial else None
+                                update_dd_payment(db, record_id, val_initial, new_shortfall_rec)
+                                st.success(f"Updated record for {rec_data['Customer_Name']}!")
+                                load_dashboard_data.clear()
+                                st.rerun(scope="app")  # Full rerun so KPIs and summaries refresh
+                            except Exception as e:
+                                st.error(f"Error: {e}")
\ No newline at end of file